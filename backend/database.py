@@ -1,8 +1,8 @@
 import os
 from dotenv import load_dotenv
 import motor.motor_asyncio
-from pymongo import ASCENDING
 from backend.utils import hash_password
+from backend.indexes import create_indexes
 
 # Load .env file for local development
 load_dotenv()
@@ -53,9 +53,7 @@ async def init_db():
 
     print("Creating indexes...")
     # Use the global 'db' object derived from the shared client
-    await db["users"].create_index("username", unique=True)
-    await db["reviews"].create_index([("createdAt", ASCENDING)])
-    await db["products"].create_index("title", unique=True)
+    await create_indexes(db)
     print("Indexes created.")
 
     if ADMIN_USERNAME and ADMIN_PASSWORD:
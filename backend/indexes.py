@@ -0,0 +1,19 @@
+from pymongo import ASCENDING, DESCENDING
+from backend.jobs import ensure_indexes as ensure_job_indexes
+
+# Index definitions, kept apart from backend.database so tools can create
+# them on their own database without building the app's client.
+
+
+async def create_indexes(database):
+    """
+    Creates every index the routes rely on.
+    `python -m backend.query_plans` checks each route's queries against these.
+    """
+    await database["users"].create_index("username", unique=True)
+    await database["reviews"].create_index([("createdAt", ASCENDING)])
+    await database["products"].create_index("title", unique=True)
+    # list_products: sorts by createdAt, optionally filtered by comingSoon
+    await database["products"].create_index([("createdAt", DESCENDING)])
+    await database["products"].create_index([("comingSoon", ASCENDING), ("createdAt", DESCENDING)])
+    await ensure_job_indexes(database)
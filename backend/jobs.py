@@ -0,0 +1,235 @@
+import os
+import asyncio
+import random
+import socket
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# --- CONFIGURATION ---
+JOBS_COLLECTION = "jobs"
+LEASE_SECONDS = int(os.getenv("JOBS_LEASE_SECONDS", 60))
+POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", 1.0))
+MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))
+BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", 2.0))
+BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", 300.0))
+# Finished jobs are purged by a TTL index after this long. Idempotency keys
+# are only remembered for as long as the job document exists.
+DONE_TTL_SECONDS = int(os.getenv("JOBS_DONE_TTL_SECONDS", 7 * 24 * 3600))
+
+# --- JOB STATES ---
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"  # Retries exhausted (dead-letter), kept for inspection
+
+Handler = Callable[[Any, Dict[str, Any]], Awaitable[None]]
+
+# job type -> {"handler", "concurrency", "max_attempts"}
+_registry: Dict[str, Dict[str, Any]] = {}
+
+
+def job(job_type: str, concurrency: int = 1, max_attempts: Optional[int] = None):
+    """
+    Decorator registering an async handler for a job type.
+    The handler is called as `await handler(db, payload)`.
+    `concurrency` caps how many jobs of this type one worker runs at once.
+    """
+    def decorator(fn: Handler) -> Handler:
+        _registry[job_type] = {
+            "handler": fn,
+            "concurrency": max(1, concurrency),
+            "max_attempts": max_attempts or MAX_ATTEMPTS,
+        }
+        return fn
+    return decorator
+
+
+async def ensure_indexes(db):
+    """Creates the indexes the claim query and idempotency checks rely on."""
+    jobs = db[JOBS_COLLECTION]
+    await jobs.create_index([("status", ASCENDING), ("type", ASCENDING), ("runAt", ASCENDING)])
+    await jobs.create_index([("status", ASCENDING), ("type", ASCENDING), ("leaseExpiresAt", ASCENDING)])
+    await jobs.create_index("idempotencyKey", unique=True, sparse=True)
+    await jobs.create_index(
+        "finishedAt",
+        expireAfterSeconds=DONE_TTL_SECONDS,
+        partialFilterExpression={"status": DONE},
+    )
+
+
+async def enqueue(
+    db,
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    idempotency_key: Optional[str] = None,
+    delay_seconds: float = 0,
+    coalesce: bool = False,
+) -> str:
+    """
+    Inserts a job and returns its id. If a job with the same idempotency key
+    already exists, nothing is inserted and the existing job's id is returned.
+    With `coalesce=True`, an already queued job of the same type is reused.
+    """
+    now = datetime.utcnow()
+    doc = {
+        "type": job_type,
+        "payload": payload or {},
+        "status": QUEUED,
+        "attempts": 0,
+        "maxAttempts": _registry.get(job_type, {}).get("max_attempts", MAX_ATTEMPTS),
+        "runAt": now + timedelta(seconds=delay_seconds),
+        "createdAt": now,
+    }
+    if idempotency_key:
+        doc["idempotencyKey"] = idempotency_key
+    if coalesce:
+        on_insert = {k: v for k, v in doc.items() if k not in ("type", "status")}
+        existing = await db[JOBS_COLLECTION].find_one_and_update(
+            {"type": job_type, "status": QUEUED},
+            {"$setOnInsert": on_insert},
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return str(existing["_id"])
+    try:
+        res = await db[JOBS_COLLECTION].insert_one(doc)
+        return str(res.inserted_id)
+    except DuplicateKeyError:
+        existing = await db[JOBS_COLLECTION].find_one({"idempotencyKey": idempotency_key}, {"_id": 1})
+        if not existing:
+            raise
+        return str(existing["_id"])
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with equal jitter (half fixed, half random), capped at BACKOFF_MAX."""
+    ceiling = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class Worker:
+    """
+    Polls the jobs collection and runs registered handlers.
+
+    Jobs are claimed atomically with `find_one_and_update`, which stamps a
+    lease on the document. The lease is renewed while the handler runs; if the
+    worker dies, the lease expires and another worker picks the job up again.
+    """
+
+    def __init__(self, db, job_types=None, worker_id: Optional[str] = None):
+        self.db = db
+        self.job_types = list(job_types) if job_types else list(_registry)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, int] = {t: 0 for t in self.job_types}
+        self._tasks = set()
+        self._stopping = asyncio.Event()
+
+    # --- Claiming ---
+    def _available_types(self):
+        return [t for t in self.job_types if self._running[t] < _registry[t]["concurrency"]]
+
+    async def claim(self):
+        """Claims one due job (or one whose lease expired) for a type with free capacity."""
+        types = self._available_types()
+        if not types:
+            return None
+        now = datetime.utcnow()
+        return await self.db[JOBS_COLLECTION].find_one_and_update(
+            {
+                "type": {"$in": types},
+                "$or": [
+                    {"status": QUEUED, "runAt": {"$lte": now}},
+                    {"status": RUNNING, "leaseExpiresAt": {"$lte": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "workerId": self.worker_id,
+                    "startedAt": now,
+                    "leaseExpiresAt": now + timedelta(seconds=LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("runAt", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    # --- Running ---
+    async def _renew_lease(self, _id: ObjectId):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            await self.db[JOBS_COLLECTION].update_one(
+                {"_id": _id, "workerId": self.worker_id, "status": RUNNING},
+                {"$set": {"leaseExpiresAt": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)}},
+            )
+
+    async def _finish(self, doc: dict, update: dict):
+        # Only the current lease holder may finish the job
+        await self.db[JOBS_COLLECTION].update_one(
+            {"_id": doc["_id"], "workerId": self.worker_id, "status": RUNNING},
+            {"$set": update, "$unset": {"leaseExpiresAt": "", "workerId": ""}},
+        )
+
+    async def run_job(self, doc: dict):
+        """Runs a claimed job. `run()` has already counted it against its type's concurrency."""
+        job_type = doc["type"]
+        try:
+            # A job whose lease expired on its final attempt goes straight to dead-letter
+            if doc["attempts"] > doc.get("maxAttempts", MAX_ATTEMPTS):
+                await self._finish(doc, {"status": DEAD, "finishedAt": datetime.utcnow(), "lastError": "Lease expired on final attempt"})
+                return
+
+            renew = asyncio.create_task(self._renew_lease(doc["_id"]))
+            try:
+                await _registry[job_type]["handler"](self.db, doc.get("payload") or {})
+            except Exception:
+                error = traceback.format_exc(limit=5)
+                if doc["attempts"] >= doc.get("maxAttempts", MAX_ATTEMPTS):
+                    print(f"Job {doc['_id']} ({job_type}) dead-lettered after {doc['attempts']} attempts.")
+                    await self._finish(doc, {"status": DEAD, "finishedAt": datetime.utcnow(), "lastError": error})
+                else:
+                    retry_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(doc["attempts"]))
+                    await self._finish(doc, {"status": QUEUED, "runAt": retry_at, "lastError": error})
+            else:
+                await self._finish(doc, {"status": DONE, "finishedAt": datetime.utcnow()})
+            finally:
+                renew.cancel()
+        finally:
+            self._running[job_type] -= 1
+
+    async def run(self):
+        """Main loop. Runs until `stop()` is called."""
+        print(f"Job worker {self.worker_id} started for: {', '.join(self.job_types) or 'nothing'}")
+        while not self._stopping.is_set():
+            try:
+                doc = await self.claim()
+            except Exception as e:
+                print(f"Error: Could not claim a job. {e}")
+                doc = None
+
+            if doc is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Count the job before the next claim() so the concurrency limit holds
+            self._running[doc["type"]] += 1
+            task = asyncio.create_task(self.run_job(doc))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        # Let in-flight jobs finish so their leases are released cleanly
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        print(f"Job worker {self.worker_id} stopped.")
+
+    def stop(self):
+        self._stopping.set()
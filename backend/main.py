@@ -3,13 +3,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
-from backend.database import init_db, get_db
-from backend import auth
+from backend.database import init_db, get_db, db
+from backend import auth, tasks  # tasks registers the job handlers
+from backend.jobs import Worker
 from backend.routes import users, reviews, products
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.responses import RedirectResponse
 import json
+import os
+import asyncio
+from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -72,7 +76,29 @@ async def api_reviews(db: AsyncIOMotorClient = Depends(get_db)):
 
 @app.get("/stats")
 async def stats(db: AsyncIOMotorClient = Depends(get_db)):
-    products_count = await db["products"].count_documents({})
-    reviews_count = await db["reviews"].count_documents({})
-    users_count = await db["users"].count_documents({})
-    return {"products": products_count, "reviews": reviews_count, "users": users_count}
+    # Counts are cached by the stats.recompute job; recount and re-cache here
+    # when the cache is missing or stale (e.g. no worker running).
+    cached = await db["stats"].find_one({"_id": "counts"}, {"_id": 0})
+    if cached:
+        age = datetime.utcnow() - cached.pop("updatedAt")
+        if age < timedelta(seconds=tasks.STATS_MAX_AGE_SECONDS):
+            return cached
+    return await tasks.cache_stats(db)
+
+# --- Background jobs ---
+# Off by default: serverless deploys (Vercel) can't keep a worker running.
+# Set JOBS_IN_PROCESS=1 on a long-running server, or run `python -m backend.worker`.
+# Job indexes are created by init_db, not on every startup.
+@app.on_event("startup")
+async def start_job_worker():
+    if os.getenv("JOBS_IN_PROCESS", "0") != "1":
+        return
+    app.state.job_worker = Worker(db)
+    app.state.job_worker_task = asyncio.create_task(app.state.job_worker.run())
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    worker = getattr(app.state, "job_worker", None)
+    if worker:
+        worker.stop()
+        await app.state.job_worker_task
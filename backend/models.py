@@ -2,6 +2,15 @@ from typing import List, Optional
 from pydantic import BaseModel, Field, AnyHttpUrl, conint
 from typing_extensions import Annotated
 
+# ---- Batch
+class BatchRequest(BaseModel):
+    ids: List[str]
+    fields: Optional[List[str]] = None  # Projection; all fields if omitted
+
+class UserBatchRequest(BaseModel):
+    usernames: List[str]
+    fields: Optional[List[str]] = None
+
 # ---- Users
 class UserCreate(BaseModel):
     username: str
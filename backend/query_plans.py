@@ -0,0 +1,395 @@
+import os
+import sys
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import motor.motor_asyncio
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from pymongo import ASCENDING, monitoring
+from pymongo.uri_parser import parse_uri
+
+# Importing the routes loads backend.database, which requires DB_NAME. The
+# handlers are given the scratch database explicitly, so a placeholder will do.
+# Load .env first so a real DB_NAME still reaches the drop guard below.
+load_dotenv()
+os.environ.setdefault("DB_NAME", "wtero_query_plans_unused")
+
+from backend.indexes import create_indexes
+from backend.jobs import JOBS_COLLECTION, DONE, QUEUED, Worker
+from backend.models import (
+    BatchRequest, ProductIn, ProductUpdate, ReviewIn, ReviewUpdate, UserBatchRequest, UserCreate,
+)
+from backend import auth, tasks, main as app_main
+from backend.routes import users, products, reviews
+
+# Query-plan regression check. Seeds a scratch database, creates the same
+# indexes as `init_db`, calls every route handler against it while recording
+# the commands they send, then runs explain("executionStats") on each one and
+# reports COLLSCANs, in-memory SORTs and queries that examine far more
+# documents than they return. Run with:
+#   python -m backend.query_plans
+# Exits with status 1 when any route has regressed off an index.
+
+# --- CONFIGURATION ---
+QUERY_PLAN_URI = os.getenv("QUERY_PLAN_URI", "mongodb://localhost:27017")
+QUERY_PLAN_DB = os.getenv("QUERY_PLAN_DB", "wtero_query_plans")
+SEED_SIZE = int(os.getenv("QUERY_PLAN_SEED_SIZE", 2000))
+MAX_EXAMINED_RATIO = float(os.getenv("QUERY_PLAN_MAX_RATIO", 10))
+
+ADMIN = {"sub": "admin", "role": "admin"}
+
+# --- ROUTES ---
+# One entry per route handler, called the way FastAPI would call it, labelled
+# "METHOD /path" exactly as registered on the app (plus an optional variant in
+# parentheses); tests/test_query_plans.py fails if an app route has no entry.
+# Handlers may raise HTTPException (e.g. a duplicate check) once their queries
+# ran. `allow` lists problems that are expected, e.g. the public export
+# endpoints deliberately scan the whole collection. Write routes come last
+# since they modify the seeded data.
+ROUTES: List[Dict[str, Any]] = [
+    # auth.py
+    {"route": "POST /auth/login",
+     "call": lambda db, s: auth.login(
+         form_data=OAuth2PasswordRequestForm(username="nobody", password="x"), db=db)},
+    # routes/users.py
+    {"route": "POST /users/add (duplicate)",
+     "call": lambda db, s: users.add_user(
+         user=UserCreate(username=s["username"], password="x"), current=ADMIN, db=db)},
+    {"route": "GET /users",
+     "call": lambda db, s: users.list_users(skip=0, limit=20, current=ADMIN, db=db)},
+    {"route": "GET /users/batch",
+     "call": lambda db, s: users.get_users_batch(
+         usernames=",".join(s["usernames"]), fields=None, current=ADMIN, db=db)},
+    {"route": "POST /users/batch",
+     "call": lambda db, s: users.post_users_batch(
+         payload=UserBatchRequest(usernames=s["usernames"], fields=["role"]), current=ADMIN, db=db)},
+    # routes/products.py
+    {"route": "POST /products (duplicate title)",
+     "call": lambda db, s: products.create_product_form(
+         title=s["title"], category="web", description="x", technologies=None, githubLink=None,
+         liveLink=None, comingSoon=False, image=None, current=ADMIN, db=db)},
+    {"route": "GET /products",
+     "call": lambda db, s: products.list_products(skip=0, limit=20, comingSoon=None, current=ADMIN, db=db)},
+    {"route": "GET /products (comingSoon=true)",
+     "call": lambda db, s: products.list_products(skip=0, limit=20, comingSoon=True, current=ADMIN, db=db)},
+    {"route": "GET /products/{product_id}",
+     "call": lambda db, s: products.get_product(product_id=str(s["product_id"]), current=ADMIN, db=db)},
+    {"route": "GET /products/batch",
+     "call": lambda db, s: products.get_products_batch(
+         ids=",".join(map(str, s["product_ids"])), fields=None, current=ADMIN, db=db)},
+    {"route": "POST /products/batch",
+     "call": lambda db, s: products.post_products_batch(
+         payload=BatchRequest(ids=list(map(str, s["product_ids"])), fields=["title"]), current=ADMIN, db=db)},
+    # routes/reviews.py
+    {"route": "GET /reviews",
+     "call": lambda db, s: reviews.list_reviews(skip=0, limit=20, current=ADMIN, db=db)},
+    {"route": "GET /reviews/{review_id}",
+     "call": lambda db, s: reviews.get_review(review_id=str(s["review_id"]), current=ADMIN, db=db)},
+    {"route": "GET /reviews/batch",
+     "call": lambda db, s: reviews.get_reviews_batch(
+         ids=",".join(map(str, s["review_ids"])), fields=None, current=ADMIN, db=db)},
+    {"route": "POST /reviews/batch",
+     "call": lambda db, s: reviews.post_reviews_batch(
+         payload=BatchRequest(ids=list(map(str, s["review_ids"])), fields=["name"]), current=ADMIN, db=db)},
+    # main.py
+    {"route": "GET /api/products", "allow": ["COLLSCAN"],
+     "call": lambda db, s: app_main.api_products(db=db)},
+    {"route": "GET /api/reviews", "allow": ["COLLSCAN"],
+     "call": lambda db, s: app_main.api_reviews(db=db)},
+    {"route": "GET /stats", "allow": ["COLLSCAN"],
+     "call": lambda db, s: app_main.stats(db=db)},
+    # Jobs. The claim query's $or branches can't share one sort order, but the
+    # set of due jobs is small, so the in-memory sort is accepted. Recounting
+    # stats scans every collection by design.
+    {"route": "JOB claim", "allow": ["SORT"],
+     "call": lambda db, s: Worker(db, job_types=["stats.recompute"]).claim()},
+    {"route": "JOB stats.recompute", "allow": ["COLLSCAN"],
+     "call": lambda db, s: tasks.recompute_stats(db, {})},
+    # Writes
+    {"route": "POST /products/json",
+     "call": lambda db, s: products.create_product_json(
+         payload=ProductIn(title="Query plan product", category="web", description="x"), current=ADMIN, db=db)},
+    {"route": "PUT /products/{product_id}",
+     "call": lambda db, s: products.update_product_form(
+         product_id=str(s["product_id"]), title=None, category="ml", description=None, technologies=None,
+         githubLink=None, liveLink=None, comingSoon=None, image=None, current=ADMIN, db=db)},
+    {"route": "PUT /products/{product_id}/json",
+     "call": lambda db, s: products.update_product_json(
+         product_id=str(s["product_id"]), payload=ProductUpdate(category="ml"), current=ADMIN, db=db)},
+    {"route": "DELETE /products/{product_id}",
+     "call": lambda db, s: products.delete_product(product_id=str(s["product_id"]), current=ADMIN, db=db)},
+    {"route": "POST /reviews",
+     "call": lambda db, s: reviews.create_review_form(
+         name="x", company="x", role="x", rating=5, text="x", avatar=None, current=ADMIN, db=db)},
+    {"route": "POST /reviews/json",
+     "call": lambda db, s: reviews.create_review_json(
+         payload=ReviewIn(name="x", company="x", role="x", rating=5, text="x"), current=ADMIN, db=db)},
+    {"route": "PUT /reviews/{review_id}",
+     "call": lambda db, s: reviews.update_review_form(
+         review_id=str(s["review_id"]), name=None, company=None, role=None, rating=4, text=None,
+         avatar=None, current=ADMIN, db=db)},
+    {"route": "PUT /reviews/{review_id}/json",
+     "call": lambda db, s: reviews.update_review_json(
+         review_id=str(s["review_id"]), payload=ReviewUpdate(text="x"), current=ADMIN, db=db)},
+    {"route": "DELETE /reviews/{review_id}",
+     "call": lambda db, s: reviews.delete_review(review_id=str(s["review_id"]), current=ADMIN, db=db)},
+    {"route": "DELETE /users/{username}",
+     "call": lambda db, s: users.delete_user(username=s["username"], current=ADMIN, db=db)},
+]
+
+
+def route_key(label: str) -> str:
+    """Drops the variant from a label: 'GET /products (comingSoon=true)' -> 'GET /products'."""
+    return " ".join(label.split()[:2])
+
+
+# Commands worth explaining, and the fields the driver adds that explain rejects
+EXPLAINABLE = {"find", "findAndModify", "aggregate", "update", "delete"}
+DRIVER_FIELDS = {"lsid", "txnNumber", "writeConcern", "readConcern"}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Records the explainable commands sent while `recording` is set."""
+
+    def __init__(self):
+        self.recording = False
+        self.commands: List[dict] = []
+
+    def started(self, event):
+        if self.recording and event.command_name in EXPLAINABLE:
+            self.commands.append({
+                k: v for k, v in event.command.items()
+                if not k.startswith("$") and k not in DRIVER_FIELDS
+            })
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# --- Seeding ---
+async def seed(db, size: int = SEED_SIZE) -> Dict[str, Any]:
+    """Fills the scratch database and returns sample values for the routes."""
+    rng = random.Random(0)  # Same data, same plans, every run
+    now = datetime.utcnow()
+    await create_indexes(db)
+
+    await db["users"].insert_many([
+        {"username": f"user{i}", "password": "x", "role": "admin" if i == 0 else "user"}
+        for i in range(max(1, size // 4))
+    ])
+    product_docs = await db["products"].insert_many([
+        {
+            "title": f"Product {i}",
+            "category": rng.choice(["web", "mobile", "ml"]),
+            "description": "Seeded for query-plan checks",
+            "image": None,
+            "technologies": ["python"],
+            "comingSoon": rng.random() < 0.2,
+            "createdAt": now - timedelta(minutes=i),
+        }
+        for i in range(size)
+    ])
+    review_docs = await db["reviews"].insert_many([
+        {
+            "name": f"Reviewer {i}",
+            "company": "Acme",
+            "role": "CTO",
+            "rating": rng.randint(1, 5),
+            "text": "Seeded for query-plan checks",
+            "avatar": None,
+            "createdAt": now - timedelta(minutes=i),
+        }
+        for i in range(size)
+    ])
+    await db[JOBS_COLLECTION].insert_many([
+        {
+            "type": "stats.recompute",
+            "payload": {},
+            "status": DONE if i % 50 else QUEUED,
+            "attempts": 1,
+            "runAt": now - timedelta(minutes=i),
+            "createdAt": now - timedelta(minutes=i),
+            **({"finishedAt": now - timedelta(minutes=i)} if i % 50 else {}),
+        }
+        for i in range(size)
+    ])
+
+    return {
+        "username": f"user{size // 8}",
+        "title": f"Product {size // 2}",
+        "product_id": product_docs.inserted_ids[size // 2],
+        "review_id": review_docs.inserted_ids[size // 2],
+        "usernames": [f"user{i}" for i in range(0, size // 4, 10)],
+        "product_ids": product_docs.inserted_ids[::40],
+        "review_ids": review_docs.inserted_ids[::40],
+    }
+
+
+# --- Explain ---
+def _stages(plan: dict):
+    """Yields every stage of a plan tree (classic and SBE explain formats)."""
+    if not plan:
+        return
+    yield plan
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+def _plan_and_stats(explained: dict) -> Tuple[dict, dict]:
+    # Aggregations not pushed down entirely report the find layer under $cursor
+    if "queryPlanner" not in explained:
+        explained = explained["stages"][0]["$cursor"]
+    return explained["queryPlanner"]["winningPlan"], explained["executionStats"]
+
+
+def command_shape(command: dict) -> Tuple[str, str, dict, dict]:
+    """Returns (command name, collection, filter, sort) for a recorded command."""
+    name = next(iter(command))
+    if name == "find":
+        query, sort = command.get("filter", {}), command.get("sort", {})
+    elif name == "findAndModify":
+        query, sort = command.get("query", {}), command.get("sort", {})
+    elif name == "update":
+        query, sort = command["updates"][0]["q"], {}
+    elif name == "delete":
+        query, sort = command["deletes"][0]["q"], {}
+    else:  # aggregate
+        first = command["pipeline"][0] if command["pipeline"] else {}
+        query, sort = first.get("$match", {}), {}
+    return name, command[name], dict(query), dict(sort)
+
+
+def analyze(explained: dict, allow=(), max_ratio: float = MAX_EXAMINED_RATIO) -> List[str]:
+    """Returns the problems found in one explain() result, minus allowed ones."""
+    plan, stats = _plan_and_stats(explained)
+    stages = {s.get("stage") for s in _stages(plan)}
+    problems = []
+    if "COLLSCAN" in stages:
+        problems.append("COLLSCAN")
+    if "SORT" in stages:
+        problems.append("SORT")
+    ratio = stats["totalDocsExamined"] / max(stats["nReturned"], 1)
+    if ratio > max_ratio:
+        problems.append(f"RATIO {ratio:.1f} ({stats['totalDocsExamined']} examined / {stats['nReturned']} returned)")
+    return [p for p in problems if p.split()[0] not in allow]
+
+
+# --- Index advisor ---
+def propose_index(query: dict, sort: dict) -> Optional[list]:
+    """
+    Suggests a compound index using the equality, sort, range rule.
+    Returns None for queries it can't reason about (top-level $or, _id lookups).
+    """
+    if any(k.startswith("$") for k in query) or "_id" in query:
+        return None
+
+    equality, ranges = [], []
+    for field, value in query.items():
+        is_operator = isinstance(value, dict) and any(k.startswith("$") for k in value)
+        (ranges if is_operator else equality).append(field)
+
+    keys = [(f, ASCENDING) for f in equality]
+    keys += [(f, d) for f, d in sort.items() if f not in equality]
+    keys += [(f, ASCENDING) for f in ranges if f not in dict(keys)]
+    return keys or None
+
+
+def _format_index(keys: list) -> str:
+    return "[" + ", ".join(f'("{f}", {"ASCENDING" if d == ASCENDING else "DESCENDING"})' for f, d in keys) + "]"
+
+
+# --- Runner ---
+def _hosts(uri: Optional[str]):
+    uri = uri or "mongodb://localhost:27017"
+    if uri.startswith("mongodb+srv://"):
+        # Resolving SRV records needs DNS; the host name identifies the cluster
+        return uri.split("://", 1)[1].split("/", 1)[0].split("@")[-1].lower()
+    return frozenset(f"{host.lower()}:{port}" for host, port in parse_uri(uri)["nodelist"])
+
+
+def is_app_database(uri: Optional[str], db_name: str) -> bool:
+    """True if `uri` + `db_name` point at the application's own database."""
+    return db_name == os.getenv("DB_NAME") and _hosts(uri) == _hosts(os.getenv("MONGODB_URI"))
+
+
+async def check(
+    uri: str = QUERY_PLAN_URI,
+    db_name: str = QUERY_PLAN_DB,
+    max_ratio: float = MAX_EXAMINED_RATIO,
+) -> List[Dict[str, Any]]:
+    """
+    Seeds a scratch database (dropped before and after), runs every route in
+    ROUTES against it and returns one report entry per command they issued.
+    """
+    if is_app_database(uri, db_name):
+        raise ValueError(f"{db_name} on {uri} is the application database; the check drops it.")
+
+    recorder = CommandRecorder()
+    client = motor.motor_asyncio.AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000, event_listeners=[recorder])
+    db = client[db_name]
+    try:
+        await client.drop_database(db_name)
+        samples = await seed(db)
+
+        report = []
+        for route in ROUTES:
+            recorder.commands = []
+            recorder.recording = True
+            try:
+                await route["call"](db, samples)
+            except HTTPException:
+                pass
+            finally:
+                recorder.recording = False
+
+            for command in recorder.commands:
+                name, collection, query, sort = command_shape(command)
+                explained = await db.command({"explain": command, "verbosity": "executionStats"})
+                problems = analyze(explained, route.get("allow", ()), max_ratio)
+                report.append({
+                    "route": route["route"],
+                    "command": name,
+                    "collection": collection,
+                    "problems": problems,
+                    "proposed_index": propose_index(query, sort) if problems else None,
+                })
+        return report
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+async def main() -> int:
+    try:
+        report = await check()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    except Exception as e:
+        print(f"Error: Could not run the query-plan check. {e}")
+        return 2
+
+    failed = [r for r in report if r["problems"]]
+    for r in report:
+        status = "FAIL" if r["problems"] else "ok"
+        print(f"[{status:4}] {r['route']}: {r['command']} {r['collection']}")
+        for problem in r["problems"]:
+            print(f"         {problem}")
+        if r["proposed_index"]:
+            print(f"         suggest: db[\"{r['collection']}\"].create_index({_format_index(r['proposed_index'])})")
+
+    print(f"{len(report) - len(failed)}/{len(report)} route queries use an index.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -4,8 +4,9 @@ from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from backend.auth import get_current_user
 from backend.database import get_db
-from backend.models import ProductIn, ProductUpdate
-from backend.utils import to_base64, serialize_doc
+from backend.models import ProductIn, ProductUpdate, BatchRequest
+from backend.utils import to_base64, serialize_doc, parse_csv, fetch_batch
+from backend.tasks import enqueue_stats
 from motor.motor_asyncio import AsyncIOMotorClient
 import json
 
@@ -63,6 +64,7 @@ async def create_product_form(
         "createdAt": datetime.utcnow()
     }
     res = await db["products"].insert_one(doc)
+    await enqueue_stats(db)
     return {"id": str(res.inserted_id)}
 
 
@@ -80,6 +82,7 @@ async def create_product_json(
     doc = payload.dict()
     doc["createdAt"] = datetime.utcnow()
     res = await db["products"].insert_one(doc)
+    await enqueue_stats(db)
     return {"id": str(res.inserted_id)}
 
 
@@ -106,6 +109,26 @@ async def list_products(
     return [serialize_doc(p) for p in await cursor.to_list(length=limit)]
 
 
+# --- GET MANY (declared before /products/{product_id} so "batch" isn't read as an id) ---
+@router.get("/products/batch")
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    current=Depends(get_current_user),
+    db: AsyncIOMotorClient = Depends(get_db)
+):
+    return {"items": await fetch_batch(db["products"], parse_csv(ids), fields=parse_csv(fields))}
+
+
+@router.post("/products/batch")
+async def post_products_batch(
+    payload: BatchRequest,
+    current=Depends(get_current_user),
+    db: AsyncIOMotorClient = Depends(get_db)
+):
+    return {"items": await fetch_batch(db["products"], payload.ids, fields=payload.fields)}
+
+
 # --- GET SINGLE (includes image) ---
 @router.get("/products/{product_id}")
 async def get_product(
@@ -210,4 +233,5 @@ async def delete_product(
     res = await db["products"].delete_one({"_id": _id})
     if res.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Not found")
+    await enqueue_stats(db)
     return {"msg": "Deleted"}
\ No newline at end of file
@@ -4,8 +4,9 @@ from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from backend.auth import get_current_user
 from backend.database import get_db
-from backend.models import ReviewIn, ReviewUpdate
-from backend.utils import to_base64, serialize_doc
+from backend.models import ReviewIn, ReviewUpdate, BatchRequest
+from backend.utils import to_base64, serialize_doc, parse_csv, fetch_batch
+from backend.tasks import enqueue_stats
 from motor.motor_asyncio import AsyncIOMotorClient
 
 router = APIRouter()
@@ -50,6 +51,7 @@ async def create_review_form(
         "createdAt": datetime.utcnow(),
     }
     res = await db["reviews"].insert_one(doc)
+    await enqueue_stats(db)
     return {"id": str(res.inserted_id)}
 
 
@@ -61,6 +63,7 @@ async def create_review_json(
 ):
     doc = {**payload.dict(), "createdAt": datetime.utcnow()}
     res = await db["reviews"].insert_one(doc)
+    await enqueue_stats(db)
     return {"id": str(res.inserted_id)}
 
 
@@ -82,6 +85,26 @@ async def list_reviews(
     return [serialize_doc(r) for r in await cursor.to_list(length=limit)]
 
 
+# Declared before /reviews/{review_id} so "batch" isn't read as an id
+@router.get("/reviews/batch")
+async def get_reviews_batch(
+    ids: str = Query(..., description="Comma-separated review ids"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    current=Depends(get_current_user),
+    db: AsyncIOMotorClient = Depends(get_db),
+):
+    return {"items": await fetch_batch(db["reviews"], parse_csv(ids), fields=parse_csv(fields))}
+
+
+@router.post("/reviews/batch")
+async def post_reviews_batch(
+    payload: BatchRequest,
+    current=Depends(get_current_user),
+    db: AsyncIOMotorClient = Depends(get_db),
+):
+    return {"items": await fetch_batch(db["reviews"], payload.ids, fields=payload.fields)}
+
+
 @router.get("/reviews/{review_id}")
 async def get_review(
     review_id: str,
@@ -146,4 +169,5 @@ async def delete_review(
     res = await db["reviews"].delete_one({"_id": _id})
     if res.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Not found")
+    await enqueue_stats(db)
     return {"msg": "Deleted"}
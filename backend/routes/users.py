@@ -1,8 +1,10 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from backend.auth import get_current_user
 from backend.database import get_db # Use the get_db dependency
-from backend.models import UserCreate
-from backend.utils import hash_password, serialize_doc
+from backend.models import UserCreate, UserBatchRequest
+from backend.utils import hash_password, serialize_doc, parse_csv, fetch_batch
+from backend.tasks import enqueue_stats
 from motor.motor_asyncio import AsyncIOMotorClient
 
 router = APIRouter()
@@ -23,6 +25,7 @@ async def add_user(user: UserCreate, current=Depends(get_current_user), db: Asyn
         "password": hash_password(user.password),
         "role": user.role
     })
+    await enqueue_stats(db)
     return {"msg": "User created successfully"}
 
 @router.get("/users")
@@ -33,9 +36,26 @@ async def list_users(
     db: AsyncIOMotorClient = Depends(get_db)
 ):
     admin_only(current)
-    cursor = db["users"].find({}, {"password": 0}).skip(skip).limit(limit)
+    cursor = db["users"].find({}, {"password": 0}).sort("username", 1).skip(skip).limit(limit)
     return [serialize_doc(u) for u in await cursor.to_list(length=limit)]
 
+@router.get("/users/batch")
+async def get_users_batch(
+    usernames: str = Query(..., description="Comma-separated usernames"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    current=Depends(get_current_user),
+    db: AsyncIOMotorClient = Depends(get_db)
+):
+    admin_only(current)
+    items = await fetch_batch(db["users"], parse_csv(usernames), key_field="username", fields=parse_csv(fields), exclude=["password"])
+    return {"items": items}
+
+@router.post("/users/batch")
+async def post_users_batch(payload: UserBatchRequest, current=Depends(get_current_user), db: AsyncIOMotorClient = Depends(get_db)):
+    admin_only(current)
+    items = await fetch_batch(db["users"], payload.usernames, key_field="username", fields=payload.fields, exclude=["password"])
+    return {"items": items}
+
 @router.delete("/users/{username}")
 async def delete_user(username: str, current=Depends(get_current_user), db: AsyncIOMotorClient = Depends(get_db)):
     admin_only(current)
@@ -44,4 +64,5 @@ async def delete_user(username: str, current=Depends(get_current_user), db: Asyn
     res = await db["users"].delete_one({"username": username})
     if res.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    await enqueue_stats(db)
     return {"msg": "User deleted"}
\ No newline at end of file
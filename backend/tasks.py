@@ -0,0 +1,48 @@
+import os
+from datetime import datetime
+from typing import Optional
+from backend.jobs import job, enqueue
+
+# Post-write work that doesn't need to finish before the response lives here
+# so route handlers can enqueue it and return. Importing this module registers
+# the handlers with the job worker.
+
+
+# --- Stats ---
+# Writes queue a recount; `/stats` also recounts (and re-caches) itself once
+# the cache is this old, so it stays correct when no worker is running.
+STATS_MAX_AGE_SECONDS = int(os.getenv("STATS_MAX_AGE_SECONDS", 60))
+
+
+async def cache_stats(db) -> dict:
+    """Counts every collection and stores the result as the `counts` stats doc."""
+    counts = {
+        "products": await db["products"].count_documents({}),
+        "reviews": await db["reviews"].count_documents({}),
+        "users": await db["users"].count_documents({}),
+    }
+    await db["stats"].update_one(
+        {"_id": "counts"},
+        {"$set": {**counts, "updatedAt": datetime.utcnow()}},
+        upsert=True,
+    )
+    return counts
+
+
+@job("stats.recompute", concurrency=1)
+async def recompute_stats(db, payload: dict):
+    """Caches collection counts for the dashboard tiles (see `/stats`)."""
+    await cache_stats(db)
+
+
+async def enqueue_stats(db) -> Optional[str]:
+    """
+    Queues a stats recount after a write. Best-effort: the write has already
+    succeeded, so a failure here is logged rather than turned into a 500.
+    """
+    try:
+        # One queued recompute covers any number of writes made before it runs
+        return await enqueue(db, "stats.recompute", coalesce=True)
+    except Exception as e:
+        print(f"Error: Could not queue stats recompute. {e}")
+        return None
@@ -1,7 +1,9 @@
 import os
 import base64
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
+from bson import ObjectId
+from fastapi import HTTPException
 from jose import jwt, JWTError
 from passlib.hash import bcrypt
 from dotenv import load_dotenv
@@ -51,3 +53,77 @@ def serialize_doc(doc: dict) -> dict:
         doc["id"] = str(doc.pop("_id"))
     return doc
 
+# ---------------- BATCH HELPERS ---------------- #
+MAX_BATCH_SIZE = 500
+
+def parse_csv(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return []
+    return [x.strip() for x in raw.split(",") if x.strip()]
+
+def build_projection(fields: List[str], key_field: str, exclude: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Turns caller-supplied field names into an inclusion projection.
+    Rejects names Mongo would refuse (empty, "$"-prefixed, overlapping paths)
+    with a 400 instead of letting the query fail.
+    """
+    exclude = set(exclude)
+    paths = {key_field}
+    for field in fields:
+        parts = field.split(".")
+        if any(not p or p.startswith("$") for p in parts):
+            raise HTTPException(status_code=400, detail=f"Invalid field: {field!r}")
+        if any(".".join(parts[:i]) in exclude for i in range(1, len(parts) + 1)):
+            continue
+        paths.add(field)
+
+    for path in paths:
+        parts = path.split(".")
+        for i in range(1, len(parts)):
+            if ".".join(parts[:i]) in paths:
+                raise HTTPException(status_code=400, detail=f"Fields {'.'.join(parts[:i])!r} and {path!r} overlap")
+    return {path: 1 for path in paths}
+
+async def fetch_batch(
+    collection,
+    keys: List[str],
+    key_field: str = "_id",
+    fields: Optional[List[str]] = None,
+    exclude: Iterable[str] = (),
+) -> List[dict]:
+    """
+    Fetches many documents with a single $in query.
+    Returns one item per requested key, in input order, with a status of
+    "found", "missing" or "invalid" (malformed ObjectId) instead of failing.
+    """
+    if not keys:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(keys) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} ids per request")
+
+    lookups = []
+    for key in keys:
+        if key_field == "_id":
+            lookups.append((key, ObjectId(key) if ObjectId.is_valid(key) else None))
+        else:
+            lookups.append((key, key))
+
+    if fields:
+        projection = build_projection(fields, key_field, exclude)
+    else:
+        projection = {f: 0 for f in exclude} or None
+
+    wanted = list({value for _, value in lookups if value is not None})
+    docs = await collection.find({key_field: {"$in": wanted}}, projection).to_list(length=len(wanted))
+    by_key = {doc[key_field]: doc for doc in docs}
+
+    items = []
+    for key, value in lookups:
+        if value is None:
+            items.append({"key": key, "status": "invalid"})
+        elif value in by_key:
+            # Copy so duplicate keys each get their own serialized doc
+            items.append({"key": key, "status": "found", "data": serialize_doc(dict(by_key[value]))})
+        else:
+            items.append({"key": key, "status": "missing"})
+    return items
@@ -0,0 +1,27 @@
+import asyncio
+import signal
+from backend.database import db
+from backend.jobs import Worker, ensure_indexes
+from backend import tasks  # noqa: F401 - registers job handlers
+
+# Standalone job worker. Run with:
+#   python -m backend.worker
+# The API only runs its own worker when JOBS_IN_PROCESS=1.
+
+
+async def main():
+    await ensure_indexes(db)
+    worker = Worker(db)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass  # Windows: fall back to KeyboardInterrupt
+
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,4 @@
+import os
+
+# backend.database needs DB_NAME at import; tests pass their own (fake) db to handlers
+os.environ.setdefault("DB_NAME", "wtero_test")
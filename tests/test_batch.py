@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from backend.models import UserBatchRequest
+from backend.routes import users
+from backend.utils import fetch_batch, build_projection, MAX_BATCH_SIZE
+
+ADMIN = {"sub": "admin", "role": "admin"}
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    """Answers `find({field: {"$in": [...]}}, projection)` over a list of dicts."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append((query, projection))
+        (field, cond), = query.items()
+        found = [dict(d) for d in self.docs if d.get(field) in cond["$in"]]
+        if projection:
+            if any(projection.values()):
+                found = [{k: v for k, v in d.items() if k in projection or k == "_id"} for d in found]
+            else:
+                found = [{k: v for k, v in d.items() if k not in projection} for d in found]
+        return FakeCursor(found)
+
+
+def products():
+    docs = [{"_id": ObjectId(), "title": f"P{i}", "category": "web"} for i in range(3)]
+    return docs, FakeCollection(docs)
+
+
+# --- fetch_batch ---
+def test_items_keep_input_order_and_report_each_key():
+    docs, collection = products()
+    missing = str(ObjectId())
+    keys = [str(docs[2]["_id"]), "not-an-id", missing, str(docs[0]["_id"])]
+
+    items = asyncio.run(fetch_batch(collection, keys))
+
+    assert [(i["key"], i["status"]) for i in items] == [
+        (keys[0], "found"), ("not-an-id", "invalid"), (missing, "missing"), (keys[3], "found"),
+    ]
+    assert items[0]["data"]["title"] == "P2"
+    assert items[0]["data"]["id"] == keys[0]
+    assert len(collection.queries) == 1
+
+
+def test_duplicate_keys_are_queried_once_and_each_get_a_copy():
+    docs, collection = products()
+    key = str(docs[1]["_id"])
+
+    items = asyncio.run(fetch_batch(collection, [key, key]))
+
+    assert [i["status"] for i in items] == ["found", "found"]
+    assert items[0]["data"] == items[1]["data"]
+    assert items[0]["data"] is not items[1]["data"]
+    query, _ = collection.queries[0]
+    assert query["_id"]["$in"] == [docs[1]["_id"]]
+
+
+def test_fields_limit_the_projection():
+    docs, collection = products()
+
+    items = asyncio.run(fetch_batch(collection, [str(docs[0]["_id"])], fields=["title"]))
+
+    assert items[0]["data"] == {"id": str(docs[0]["_id"]), "title": "P0"}
+
+
+@pytest.mark.parametrize("keys", [[], [str(ObjectId()) for _ in range(MAX_BATCH_SIZE + 1)]])
+def test_empty_or_oversized_batches_are_rejected(keys):
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(fetch_batch(FakeCollection([]), keys))
+    assert err.value.status_code == 400
+
+
+# --- Projection ---
+@pytest.mark.parametrize("fields", [[""], ["$x"], ["a..b"], ["a.$b"], ["a", "a.b"], ["_id.x"]])
+def test_bad_fields_are_a_400(fields):
+    with pytest.raises(HTTPException) as err:
+        build_projection(fields, "_id")
+    assert err.value.status_code == 400
+
+
+def test_projection_drops_excluded_fields_and_keeps_the_key():
+    projection = build_projection(["role", "password", "password.salt"], "username", exclude=["password"])
+    assert projection == {"role": 1, "username": 1}
+
+
+# --- /users/batch ---
+def users_db():
+    docs = [{"_id": ObjectId(), "username": name, "password": "hash", "role": "user"} for name in ("ann", "bob")]
+    return {"users": FakeCollection(docs)}
+
+
+def test_users_batch_never_returns_passwords():
+    db = users_db()
+
+    plain = asyncio.run(users.get_users_batch(usernames="bob,zed,ann", fields=None, current=ADMIN, db=db))
+    asked = asyncio.run(users.post_users_batch(
+        payload=UserBatchRequest(usernames=["ann"], fields=["password", "role"]), current=ADMIN, db=db))
+
+    assert [(i["key"], i["status"]) for i in plain["items"]] == [("bob", "found"), ("zed", "missing"), ("ann", "found")]
+    for item in plain["items"] + asked["items"]:
+        assert "password" not in item.get("data", {})
+    assert asked["items"][0]["data"]["role"] == "user"
+
+
+def test_users_batch_is_admin_only():
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(users.get_users_batch(usernames="ann", fields=None, current={"role": "user"}, db=users_db()))
+    assert err.value.status_code == 403
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from backend import jobs
+
+
+class FakeJobs:
+    """The slice of a Motor collection the worker uses, over a list of dicts."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def find_one_and_update(self, query, update, sort=None, return_document=None):
+        queued, running = query["$or"]
+        due = [
+            d for d in self.docs
+            if d["type"] in query["type"]["$in"] and (
+                (d["status"] == queued["status"] and d["runAt"] <= queued["runAt"]["$lte"])
+                or (d["status"] == running["status"] and d.get("leaseExpiresAt")
+                    and d["leaseExpiresAt"] <= running["leaseExpiresAt"]["$lte"])
+            )
+        ]
+        if not due:
+            return None
+        doc = min(due, key=lambda d: d["runAt"])
+        doc.update(update["$set"])
+        for k, v in update["$inc"].items():
+            doc[k] = doc.get(k, 0) + v
+        return dict(doc)
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if all(doc.get(k) == v for k, v in query.items()):
+                doc.update(update.get("$set", {}))
+                for k in update.get("$unset", {}):
+                    doc.pop(k, None)
+                return
+
+
+def make_job(job_type="test", **fields):
+    doc = {
+        "_id": ObjectId(),
+        "type": job_type,
+        "payload": {},
+        "status": jobs.QUEUED,
+        "attempts": 0,
+        "maxAttempts": 3,
+        "runAt": datetime.utcnow() - timedelta(seconds=1),
+    }
+    doc.update(fields)
+    return doc
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(jobs, "_registry", {})
+    return jobs._registry
+
+
+def run_claimed(worker):
+    """Claims one job and runs it the way Worker.run() does."""
+    async def go():
+        doc = await worker.claim()
+        worker._running[doc["type"]] += 1
+        await worker.run_job(doc)
+    asyncio.run(go())
+
+
+# --- Backoff ---
+def test_backoff_doubles_with_jitter_and_caps():
+    for attempts in range(1, 6):
+        ceiling = jobs.BACKOFF_BASE * 2 ** (attempts - 1)
+        assert ceiling / 2 <= jobs.backoff_seconds(attempts) <= ceiling
+    assert jobs.backoff_seconds(100) <= jobs.BACKOFF_MAX
+
+
+# --- Claiming ---
+def test_claim_takes_due_job_and_sets_lease(registry):
+    jobs.job("test")(lambda db, payload: None)
+    due = make_job()
+    later = make_job(runAt=datetime.utcnow() + timedelta(hours=1))
+    worker = jobs.Worker({"jobs": FakeJobs([later, due])}, worker_id="w1")
+
+    claimed = asyncio.run(worker.claim())
+
+    assert claimed["_id"] == due["_id"]
+    assert claimed["status"] == jobs.RUNNING
+    assert claimed["workerId"] == "w1"
+    assert claimed["attempts"] == 1
+    assert claimed["leaseExpiresAt"] > datetime.utcnow()
+    assert later["status"] == jobs.QUEUED
+
+
+def test_claim_reclaims_expired_lease(registry):
+    jobs.job("test")(lambda db, payload: None)
+    stale = make_job(status=jobs.RUNNING, attempts=1, workerId="dead",
+                     leaseExpiresAt=datetime.utcnow() - timedelta(seconds=1))
+    worker = jobs.Worker({"jobs": FakeJobs([stale])}, worker_id="w1")
+
+    claimed = asyncio.run(worker.claim())
+
+    assert claimed["workerId"] == "w1"
+    assert claimed["attempts"] == 2
+
+
+def test_claim_skips_types_at_their_concurrency_limit(registry):
+    jobs.job("test", concurrency=1)(lambda db, payload: None)
+    worker = jobs.Worker({"jobs": FakeJobs([make_job()])})
+    worker._running["test"] = 1
+
+    assert asyncio.run(worker.claim()) is None
+
+
+# --- Running ---
+def test_successful_job_is_marked_done(registry):
+    async def handler(db, payload):
+        pass
+    jobs.job("test")(handler)
+    doc = make_job()
+    worker = jobs.Worker({"jobs": FakeJobs([doc])})
+
+    run_claimed(worker)
+
+    assert doc["status"] == jobs.DONE
+    assert "leaseExpiresAt" not in doc
+    assert worker._running["test"] == 0
+
+
+def test_failed_job_is_requeued_with_backoff(registry):
+    async def handler(db, payload):
+        raise RuntimeError("boom")
+    jobs.job("test")(handler)
+    doc = make_job()
+    worker = jobs.Worker({"jobs": FakeJobs([doc])})
+
+    run_claimed(worker)
+
+    assert doc["status"] == jobs.QUEUED
+    assert doc["runAt"] > datetime.utcnow()
+    assert "boom" in doc["lastError"]
+    assert worker._running["test"] == 0
+
+
+def test_failed_job_is_dead_lettered_on_last_attempt(registry):
+    async def handler(db, payload):
+        raise RuntimeError("boom")
+    jobs.job("test")(handler)
+    doc = make_job(attempts=2)
+    worker = jobs.Worker({"jobs": FakeJobs([doc])})
+
+    run_claimed(worker)
+
+    assert doc["status"] == jobs.DEAD
+    assert doc["attempts"] == 3
+
+
+def test_expired_lease_on_last_attempt_is_dead_lettered_without_running(registry):
+    calls = []
+
+    async def handler(db, payload):
+        calls.append(payload)
+    jobs.job("test")(handler)
+    doc = make_job(status=jobs.RUNNING, attempts=3, workerId="dead",
+                   leaseExpiresAt=datetime.utcnow() - timedelta(seconds=1))
+    worker = jobs.Worker({"jobs": FakeJobs([doc])})
+
+    run_claimed(worker)
+
+    assert calls == []
+    assert doc["status"] == jobs.DEAD
+    assert worker._running["test"] == 0
+
+
+def test_worker_never_exceeds_type_concurrency(registry, monkeypatch):
+    monkeypatch.setattr(jobs, "POLL_INTERVAL", 0.01)
+    active, peak = [0], [0]
+
+    async def handler(db, payload):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+    jobs.job("test", concurrency=1)(handler)
+    docs = [make_job() for _ in range(3)]
+    worker = jobs.Worker({"jobs": FakeJobs(docs)})
+
+    async def go():
+        runner = asyncio.create_task(worker.run())
+        while any(d["status"] != jobs.DONE for d in docs):
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await runner
+    asyncio.run(asyncio.wait_for(go(), timeout=5))
+
+    assert peak[0] == 1
@@ -0,0 +1,130 @@
+import os
+import asyncio
+from types import SimpleNamespace
+import pytest
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+from backend import query_plans, main
+
+# App routes that send no queries, so need no ROUTES entry
+NO_QUERY_ROUTES = {
+    "GET /", "GET /auth/me",
+    "GET /ui/login", "GET /ui/dashboard", "GET /ui/reviews", "GET /ui/products", "GET /ui/users",
+    "GET /docs", "GET /docs/oauth2-redirect", "GET /redoc", "GET /openapi.json",
+}
+
+
+def _explained(stages, examined=20, returned=20):
+    """Builds a minimal explain() result with the given stage chain, outermost first."""
+    plan = {}
+    for stage in reversed(stages):
+        plan = {"stage": stage, "inputStage": plan} if plan else {"stage": stage}
+    return {
+        "queryPlanner": {"winningPlan": plan},
+        "executionStats": {"totalDocsExamined": examined, "nReturned": returned},
+    }
+
+
+# --- Analysis ---
+def test_analyze_passes_index_scan():
+    assert query_plans.analyze(_explained(["LIMIT", "FETCH", "IXSCAN"])) == []
+
+
+def test_analyze_flags_collscan_sort_and_ratio():
+    problems = query_plans.analyze(_explained(["SORT", "COLLSCAN"], examined=2000, returned=20))
+    assert problems[:2] == ["COLLSCAN", "SORT"]
+    assert problems[2].startswith("RATIO 100.0")
+
+
+def test_analyze_respects_allow():
+    assert query_plans.analyze(_explained(["COLLSCAN"]), allow=["COLLSCAN"]) == []
+
+
+def test_analyze_reads_aggregate_cursor_stage():
+    explained = {"stages": [{"$cursor": _explained(["COLLSCAN"])}, {"$group": {}}]}
+    assert query_plans.analyze(explained) == ["COLLSCAN"]
+
+
+def test_propose_index_orders_equality_sort_range():
+    keys = query_plans.propose_index(
+        {"rating": {"$gte": 4}, "comingSoon": True}, {"createdAt": DESCENDING}
+    )
+    assert keys == [("comingSoon", ASCENDING), ("createdAt", DESCENDING), ("rating", ASCENDING)]
+
+
+def test_propose_index_skips_id_and_or_queries():
+    assert query_plans.propose_index({"_id": 1}, {}) is None
+    assert query_plans.propose_index({"$or": [{"a": 1}, {"b": 2}]}, {}) is None
+
+
+# --- Recording ---
+def test_recorder_strips_driver_fields_and_ignores_other_commands():
+    recorder = query_plans.CommandRecorder()
+    recorder.recording = True
+    recorder.started(SimpleNamespace(command_name="insert", command={"insert": "products"}))
+    recorder.started(SimpleNamespace(command_name="find", command={
+        "find": "products", "filter": {"comingSoon": True}, "sort": {"createdAt": -1},
+        "lsid": {}, "$db": "x", "$clusterTime": {},
+    }))
+
+    assert recorder.commands == [{"find": "products", "filter": {"comingSoon": True}, "sort": {"createdAt": -1}}]
+    assert query_plans.command_shape(recorder.commands[0]) == (
+        "find", "products", {"comingSoon": True}, {"createdAt": -1}
+    )
+
+
+def test_command_shape_for_writes():
+    update = {"update": "products", "updates": [{"q": {"_id": 1}, "u": {"$set": {"a": 1}}}]}
+    assert query_plans.command_shape(update) == ("update", "products", {"_id": 1}, {})
+
+
+# --- Coverage ---
+def test_every_app_route_is_checked():
+    app_routes = {
+        f"{method} {route.path}"
+        for route in main.app.routes
+        for method in getattr(route, "methods", None) or ()
+        if method != "HEAD"
+    }
+    checked = {query_plans.route_key(r["route"]) for r in query_plans.ROUTES}
+
+    assert app_routes - NO_QUERY_ROUTES - checked == set(), "add these routes to query_plans.ROUTES"
+    assert checked - app_routes == {"JOB claim", "JOB stats.recompute"}
+
+
+# --- Safety ---
+def test_refuses_the_application_database(monkeypatch):
+    monkeypatch.setenv("MONGODB_URI", "mongodb://db.example.com:27017/")
+    monkeypatch.setenv("DB_NAME", "wtero")
+
+    assert query_plans.is_app_database("mongodb://db.example.com:27017", "wtero")
+    assert not query_plans.is_app_database("mongodb://localhost:27017", "wtero")
+    assert not query_plans.is_app_database("mongodb://db.example.com:27017", "scratch")
+    with pytest.raises(ValueError):
+        asyncio.run(query_plans.check("mongodb://db.example.com:27017", "wtero"))
+
+
+# --- Regression check against a real server ---
+@pytest.fixture
+def query_plan_server():
+    """
+    Skips without a reachable MongoDB, unless QUERY_PLAN_URI was set
+    explicitly - then CI asked for the check and an unreachable server fails.
+    """
+    client = MongoClient(query_plans.QUERY_PLAN_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        message = f"no MongoDB at {query_plans.QUERY_PLAN_URI} ({type(e).__name__})"
+        if os.getenv("QUERY_PLAN_URI"):
+            pytest.fail(message)
+        pytest.skip(message)
+    finally:
+        client.close()
+
+
+def test_every_route_query_uses_an_index(query_plan_server):
+    report = asyncio.run(query_plans.check())
+
+    assert {r["route"] for r in report} == {r["route"] for r in query_plans.ROUTES}
+    assert {r["route"]: r["problems"] for r in report if r["problems"]} == {}
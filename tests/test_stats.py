@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta
+from backend import main, tasks
+
+
+class FakeCounted:
+    def __init__(self, n):
+        self.n = n
+        self.calls = 0
+
+    async def count_documents(self, query):
+        self.calls += 1
+        return self.n
+
+
+class FakeStats:
+    def __init__(self, doc=None):
+        self.doc = doc
+
+    async def find_one(self, query, projection=None):
+        return {k: v for k, v in self.doc.items() if k != "_id"} if self.doc else None
+
+    async def update_one(self, query, update, upsert=False):
+        self.doc = {"_id": query["_id"], **update["$set"]}
+
+
+def fake_db(cached=None):
+    return {"products": FakeCounted(3), "reviews": FakeCounted(2), "users": FakeCounted(1), "stats": FakeStats(cached)}
+
+
+def test_fresh_cache_is_served_without_counting():
+    db = fake_db({"_id": "counts", "products": 9, "reviews": 9, "users": 9, "updatedAt": datetime.utcnow()})
+
+    assert asyncio.run(main.stats(db=db)) == {"products": 9, "reviews": 9, "users": 9}
+    assert db["products"].calls == 0
+
+
+def test_stale_cache_is_recounted_and_written_back():
+    stale = datetime.utcnow() - timedelta(seconds=tasks.STATS_MAX_AGE_SECONDS + 1)
+    db = fake_db({"_id": "counts", "products": 9, "reviews": 9, "users": 9, "updatedAt": stale})
+
+    assert asyncio.run(main.stats(db=db)) == {"products": 3, "reviews": 2, "users": 1}
+    assert db["stats"].doc["products"] == 3
+    assert db["stats"].doc["updatedAt"] > stale
+
+    # The refreshed cache serves the next call
+    asyncio.run(main.stats(db=db))
+    assert db["products"].calls == 1
+
+
+def test_missing_cache_is_counted():
+    db = fake_db()
+    assert asyncio.run(main.stats(db=db)) == {"products": 3, "reviews": 2, "users": 1}
+    assert db["stats"].doc is not None
@@ -0,0 +1,12 @@
+import asyncio
+from backend import tasks
+
+
+class FailingJobs:
+    async def find_one_and_update(self, *args, **kwargs):
+        raise RuntimeError("connection reset")
+
+
+def test_enqueue_stats_failure_does_not_raise(capsys):
+    assert asyncio.run(tasks.enqueue_stats({"jobs": FailingJobs()})) is None
+    assert "Could not queue stats recompute" in capsys.readouterr().out